@@ -9,6 +9,9 @@ import os
 import time
 from datetime import datetime
 from PIL import Image, ImageTk  # pip install pillow
+from progress import ProgressTracker, format_progress
+from profiling import profile_run
+from transport import build_session, format_stats
 
 # Desactivar warnings SSL
 requests.packages.urllib3.disable_warnings()
@@ -80,6 +83,19 @@ class GraphPyGUI:
         self.btn_cancel = tb.Button(frame_buttons, text="Cancelar", bootstyle="danger", command=self.cancel_inventory, state="disabled")
         self.btn_cancel.pack(side="left", padx=5)
 
+        self.var_profile = tk.BooleanVar(value=False)
+        self.var_profile_memory = tk.BooleanVar(value=False)
+        tb.Checkbutton(frame_buttons, text="Perfilar", variable=self.var_profile, bootstyle="round-toggle").pack(side="left", padx=5)
+        tb.Checkbutton(frame_buttons, text="Perfilar memoria", variable=self.var_profile_memory, bootstyle="round-toggle").pack(side="left", padx=5)
+
+        # --- Progreso ---
+        frame_progress = ttk.Frame(root)
+        frame_progress.pack(fill="x", padx=10, pady=(0,5))
+        self.progress_bar = tb.Progressbar(frame_progress, mode="determinate", maximum=100, bootstyle="success-striped")
+        self.progress_bar.pack(fill="x")
+        self.lbl_progress = ttk.Label(frame_progress, text="", anchor="w")
+        self.lbl_progress.pack(fill="x")
+
         # --- Consola ---
         frame_console = ttk.LabelFrame(root, text="Consola (logs)", padding=10)
         frame_console.pack(fill="both", expand=True, padx=10, pady=5)
@@ -93,6 +109,11 @@ class GraphPyGUI:
         # Variables de control
         self.cancel_event = threading.Event()
         self.log_file = None
+        self.profile = False
+        self.profile_memory = False
+        self.session = None
+        self.progress = ProgressTracker()
+        self.progress_refresh_ms = 250
 
     # --- Funciones ---
     def log(self, msg):
@@ -122,8 +143,9 @@ class GraphPyGUI:
             return
         hostname = f"https://{host_port}"
         try:
-            resp = requests.get(f"{hostname}/graphman", auth=(user,password), verify=False, timeout=5)
-            resp.raise_for_status()
+            with build_session(retries=0) as session:
+                resp = session.get(f"{hostname}/graphman", auth=(user,password), verify=False, timeout=5)
+                resp.raise_for_status()
             self.log("✅ Conexión correcta.")
             messagebox.showinfo("Conexión", "Conexión exitosa")
         except Exception as e:
@@ -139,19 +161,49 @@ class GraphPyGUI:
         default_log_name = f"GraphPy_runtime_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
         self.log_file = os.path.join(os.getcwd(), default_log_name)
 
+        self.progress.reset()
+        self.progress_bar["value"] = 0
+        self.profile = self.var_profile.get()
+        self.profile_memory = self.var_profile_memory.get()
         thread = threading.Thread(target=self.run_inventory)
         thread.start()
+        self.root.after(self.progress_refresh_ms, self.refresh_progress, thread)
+
+    def refresh_progress(self, worker):
+        # Se ejecuta en el hilo de Tk con frecuencia acotada; el inventario solo actualiza contadores
+        snap = self.progress.snapshot()
+        self.progress_bar["value"] = snap["percent"]
+        self.lbl_progress.configure(text=format_progress(snap))
+        if worker.is_alive():
+            self.root.after(self.progress_refresh_ms, self.refresh_progress, worker)
 
     def cancel_inventory(self):
         self.cancel_event.set()
         self.log("⚠️ Petición de cancelación enviada por el usuario.")
 
     def run_inventory(self):
+        # El perfil se guarda junto al CSV; sin perfilar, profile_run no añade coste
+        output_csv = self.output_csv_path(self.entry_csv.get().strip())
+        with profile_run(output_csv, enabled=self.profile, memory=self.profile_memory) as profiler:
+            self._run_inventory(output_csv)
+        if profiler is not None:
+            for pf in profiler.files:
+                self.log(f"Perfil guardado en: {pf}")
+            if profiler.error:
+                self.log(f"❌ Error guardando el perfil: {profiler.error}")
+
+    def output_csv_path(self, csv_name):
+        # --- CSV: manejo correcto de rutas absolutas ---
+        default_prefix = "Inventario_apis_"
+        if csv_name:
+            return csv_name if os.path.isabs(csv_name) else os.path.join(os.getcwd(), default_prefix + csv_name + ".csv")
+        return os.path.join(os.getcwd(), default_prefix + datetime.now().strftime('%Y%m%d_%H%M%S') + ".csv")
+
+    def _run_inventory(self, output_csv):
         host_port = self.entry_host.get().strip()
         user = self.entry_user.get().strip()
         password = self.entry_pass.get().strip()
         folders_input = self.entry_folders.get().strip()
-        csv_name = self.entry_csv.get().strip()
 
         if not host_port or not user or not password or not folders_input:
             self.log("❌ Error: Campos incompletos.")
@@ -164,13 +216,8 @@ class GraphPyGUI:
         # Carpeta raíz procesada
         folders_list = [("/" + f.strip()) if not f.strip().startswith("/") else f.strip() for f in folders_input.split(";") if f.strip()]
 
-        # --- CSV: manejo correcto de rutas absolutas ---
-        default_prefix = "Inventario_apis_"
-        if csv_name:
-            output_csv = csv_name if os.path.isabs(csv_name) else os.path.join(os.getcwd(), default_prefix + csv_name + ".csv")
-        else:
-            output_csv = os.path.join(os.getcwd(), default_prefix + datetime.now().strftime('%Y%m%d_%H%M%S') + ".csv")
-
+        # Sin reintentos: una carpeta que falla se registra y se pasa a la siguiente, y Cancelar responde
+        self.session = build_session(retries=0)
         self.log("=== Inicio Inventario APIs ===")
         start_time = time.time()
         all_services = []
@@ -179,17 +226,20 @@ class GraphPyGUI:
         if len(folders_list) > 50:
             self.log("⚠️ Atención: Gran volumen de carpetas detectado, esto puede tardar un poco. No cierre la aplicación.")
 
+        self.progress.start_phase("carpetas", total=len(folders_list))
         for idx, folder in enumerate(folders_list, start=1):
             if self.cancel_event.is_set():
                 break
             self.log(f"[{idx}/{len(folders_list)}] Procesando carpeta: {folder}")
             services = self.list_apis(hostname, auth, folder)
+            self.progress.step(services=len(services))
             if not services:
                 self.log(f"   ⚠️ Carpeta vacía: {folder}")
                 empty_folders.append(folder)
             else:
                 self.log(f"   ✅ {len(services)} APIs encontradas.")
                 all_services.extend(services)
+        self.progress.finish_phase()
 
         if not self.cancel_event.is_set() and all_services:
             keys = ["folderPath", "name", "resolutionPath"]
@@ -206,6 +256,8 @@ class GraphPyGUI:
         self.log(f"Duración: {elapsed:.2f} segundos")
         self.log(f"Carpetas procesadas: {len(folders_list)}")
         self.log(f"APIs encontradas: {len(all_services)}")
+        self.log(f"Peticiones realizadas: {self.progress.requests} | {format_progress(self.progress.snapshot())}")
+        self.log(f"Transporte: {format_stats(self.session.stats())}")
         if empty_folders:
             self.log("Carpetas vacías detectadas: " + ", ".join(empty_folders))
 
@@ -230,7 +282,8 @@ class GraphPyGUI:
         """
         payload = {"query": query, "variables": {"folderPath": folder_path}}
         try:
-            resp = requests.post(url, headers=headers, auth=auth, json=payload, verify=False, timeout=10)
+            self.progress.request()
+            resp = self.session.post(url, headers=headers, auth=auth, json=payload, verify=False, timeout=10)
             resp.raise_for_status()
             data = resp.json()
             return data.get("data", {}).get("webApiServicesByFolderPath", [])
@@ -12,10 +12,11 @@ import csv
 import time
 import os
 from datetime import datetime
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 from tkinter import filedialog, messagebox, font as tkfont
 import tkinter as tk
+from progress import ProgressTracker, count_subtree, format_progress
+from profiling import profile_run
+from transport import build_session, format_stats
 
 try:
     import ttkbootstrap as tb
@@ -38,6 +39,7 @@ requests.packages.urllib3.disable_warnings()
 
 hostname = ""
 CANCEL_EVENT = threading.Event()
+PROGRESS = ProgressTracker()
 
 def timestamp():
     return datetime.now().strftime("%d-%m-%Y %H:%M:%S")
@@ -50,6 +52,7 @@ def fetch_with_retry(url, session, auth, retries=5, backoff_factor=1, timeout=No
                 log_callback(f"[{timestamp()}] Cancelado antes de la petición {url}\n")
             return None
         try:
+            PROGRESS.request()
             resp = session.get(url, auth=auth, verify=False, timeout=timeout)
             resp.raise_for_status()
             return resp
@@ -137,7 +140,9 @@ def parse_services(xml_content):
     return services, subfolders
 
 def traverse_folder(folder_id, path, session, auth, visited_folders, api_map, empty_folders, log_callback=None):
-    if CANCEL_EVENT.is_set() or folder_id in visited_folders:
+    if CANCEL_EVENT.is_set():
+        return
+    if folder_id in visited_folders:
         return
     visited_folders.add(folder_id)
 
@@ -146,9 +151,12 @@ def traverse_folder(folder_id, path, session, auth, visited_folders, api_map, em
     if resp is None:
         if log_callback:
             log_callback(f"[{timestamp()}] No se pudo obtener dependencias de carpeta {folder_id}\n")
+        PROGRESS.step()
         return
 
     services, subfolders = parse_services(resp.text)
+    PROGRESS.discover(sum(1 for sf in subfolders if sf["id"] not in visited_folders))
+    PROGRESS.step(services=len(services))
     saved = 0
     for s in services:
         if s["id"] not in api_map or len(path.split("/")) > len(api_map[s["id"]]["folderPath"].split("/")):
@@ -170,7 +178,8 @@ def traverse_folder(folder_id, path, session, auth, visited_folders, api_map, em
             log_callback(f"[{timestamp()}] Sub-progreso ({idx}/{len(subfolders)}) -> {sub_path}\n")
         traverse_folder(sf["id"], sub_path, session, auth, visited_folders, api_map, empty_folders, log_callback)
 
-def get_all_folders(session, auth, log_callback=None):
+def get_all_folders(session, auth, log_callback=None, parents=None):
+    """Lista (nombre, id) de carpetas; si se pasa `parents` se rellena con {id: id_padre} del mismo listado"""
     url = f"{hostname}/restman/1.0/folders"
     resp = fetch_with_retry(url, session, auth, log_callback=log_callback, timeout=None, retries=6, backoff_factor=2)
     if resp is None:
@@ -179,25 +188,145 @@ def get_all_folders(session, auth, log_callback=None):
         return []
     root = ET.fromstring(resp.text)
     ns = {"l7": "http://ns.l7tech.com/2010/04/gateway-management"}
-    return [(item.find("l7:Name", ns).text, item.find("l7:Id", ns).text) for item in root.findall("l7:Item", ns)]
+    items = root.findall("l7:Item", ns)
+    if parents is not None:
+        for item in items:
+            folder = item.find("l7:Resource/l7:Folder", ns)
+            if folder is not None and folder.get("folderId"):
+                parents[item.find("l7:Id", ns).text] = folder.get("folderId")
+    return [(item.find("l7:Name", ns).text, item.find("l7:Id", ns).text) for item in items]
 
-def run_inventory(host, user, password, folders_input, output_file, log_callback):
-    global hostname
-    CANCEL_EVENT.clear()
-    hostname = host if host.startswith("http") else "https://" + host
-    target_paths = [f.strip() for f in folders_input.split(";") if f.strip()]
+# =========================
+# Graphman (V11) y selección de motor
+# =========================
 
-    session = requests.Session()
-    retries = Retry(total=5, backoff_factor=1, status_forcelist=[500,502,503,504])
-    session.mount("https://", HTTPAdapter(max_retries=retries))
-    auth = (user, password)
+GRAPHMAN_HEADERS = {"Content-Type": "application/json", "X-REQUEST-TYPE": "GraphQL"}
+# RESTMAN devuelve todos los servicios de la carpeta (Web API y SOAP), así que se piden ambos.
+# El resolutionPath de los SOAP se completa después por RESTMAN con su goid.
+GRAPHMAN_QUERY = """
+query servicesByFolderPath ($folderPath: String!) {
+    webApiServicesByFolderPath (folderPath: $folderPath) {
+        goid
+        folderPath
+        name
+        resolutionPath
+    }
+    soapServicesByFolderPath (folderPath: $folderPath) {
+        goid
+        folderPath
+        name
+    }
+}
+"""
+
+def normalize_folder_path(path):
+    """Mismo formato de folderPath para RESTMAN ("Carpeta/Sub") y Graphman ("/Carpeta/Sub")"""
+    return "/" + path.strip().strip("/")
+
+def probe_engine(session, auth, log_callback=None):
+    """Devuelve "graphman" si el gateway responde a Graphman (V11); si no, "restman" """
+    try:
+        PROGRESS.request()
+        resp = session.post(f"{hostname}/graphman", headers=GRAPHMAN_HEADERS, auth=auth,
+                            json={"query": "{ __typename }"}, verify=False, timeout=10)
+        resp.raise_for_status()
+        data = resp.json()
+        if isinstance(data, dict) and not data.get("errors"):
+            return "graphman"
+        if log_callback:
+            log_callback(f"[{timestamp()}] Graphman respondió con errores, se usará RESTMAN\n")
+    except (requests.exceptions.RequestException, ValueError) as e:
+        if log_callback:
+            log_callback(f"[{timestamp()}] Graphman no disponible ({e}), se usará RESTMAN\n")
+    return "restman"
 
+def graphman_list_apis(folder_path, session, auth):
+    """
+    Servicios Web API y SOAP de una carpeta vía Graphman. Lanza ValueError si la respuesta no
+    tiene la forma esperada, para que el llamador use RESTMAN en esa carpeta.
+    """
+    PROGRESS.request()
+    resp = session.post(f"{hostname}/graphman", headers=GRAPHMAN_HEADERS, auth=auth,
+                        json={"query": GRAPHMAN_QUERY, "variables": {"folderPath": folder_path}},
+                        verify=False, timeout=60)
+    resp.raise_for_status()
+    data = resp.json()
+    if not isinstance(data, dict):
+        raise ValueError("respuesta Graphman no válida")
+    if data.get("errors"):
+        raise ValueError(f"errores Graphman: {data['errors']}")
+    result = data.get("data")
+    if not isinstance(result, dict):
+        raise ValueError("respuesta Graphman sin data")
+
+    services = []
+    for field in ("webApiServicesByFolderPath", "soapServicesByFolderPath"):
+        items = result.get(field) or []
+        if not isinstance(items, list):
+            raise ValueError(f"respuesta Graphman no válida en {field}")
+        for item in items:
+            if item is None:
+                continue
+            if not isinstance(item, dict):
+                raise ValueError(f"respuesta Graphman no válida en {field}")
+            if not isinstance(item.get("name"), str) or not item["name"]:
+                raise ValueError(f"servicio sin nombre en {field}")
+            if item.get("folderPath") is not None and not isinstance(item["folderPath"], str):
+                raise ValueError(f"folderPath no válido en {field}")
+            if item.get("resolutionPath") is not None and not isinstance(item["resolutionPath"], str):
+                raise ValueError(f"resolutionPath no válido en {field}")
+            if field == "soapServicesByFolderPath" and not item.get("goid"):
+                raise ValueError("servicio SOAP sin goid")
+            services.append(item)
+    return services
+
+def collect_graphman(target_paths, session, auth, api_map, empty_folders, log_callback=None):
+    """Inventario por Graphman; devuelve las carpetas que fallaron para recorrerlas por RESTMAN"""
+    failed = []
+    PROGRESS.start_phase("carpetas", total=len(target_paths))
+    for idx, tp in enumerate(target_paths, start=1):
+        if CANCEL_EVENT.is_set():
+            break
+        folder_path = normalize_folder_path(tp)
+        try:
+            services = graphman_list_apis(folder_path, session, auth)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            if log_callback:
+                log_callback(f"[{timestamp()}] Graphman falló en {folder_path}: {e}\n")
+            failed.append(tp)
+            PROGRESS.step()
+            continue
+        PROGRESS.step(services=len(services))
+
+        saved = 0
+        for s in services:
+            service_id = s.get("goid") or f"{s.get('folderPath')}/{s.get('name')}"
+            # Mismo formato interno que traverse_folder ("Carpeta/Sub"), se normaliza al escribir el CSV
+            path = (s.get("folderPath") or folder_path).strip("/")
+            if service_id not in api_map or len(path.split("/")) > len(api_map[service_id]["folderPath"].split("/")):
+                api_map[service_id] = {"serviceName": s.get("name", ""), "folderPath": path}
+                # Los SOAP no traen resolutionPath: collect_resolution_paths lo pide por RESTMAN
+                if "resolutionPath" in s:
+                    api_map[service_id]["resolutionPath"] = s.get("resolutionPath") or "N/A"
+                saved += 1
+        if log_callback:
+            log_callback(f"[{timestamp()}] Progreso ({idx}/{len(target_paths)}) -> {folder_path}: {saved} servicios\n")
+        if not services:
+            if log_callback:
+                log_callback(f"[{timestamp()}] Carpeta vacía: {folder_path}\n")
+            empty_folders.append(folder_path)
+    PROGRESS.finish_phase()
+    return failed
+
+def collect_restman(target_paths, session, auth, api_map, visited_folders, empty_folders, log_callback=None):
+    """Recorre por RESTMAN las carpetas raíz que coinciden con target_paths (varias peticiones por carpeta)"""
     start_time = time.time()
     if log_callback:
-        log_callback(f"[{timestamp()}] Obteniendo lista de carpetas raí­z...\n")
-    all_folders = get_all_folders(session, auth, log_callback=log_callback)
+        log_callback(f"[{timestamp()}] Obteniendo lista de carpetas raíz...\n")
+    parents = {}
+    all_folders = get_all_folders(session, auth, log_callback=log_callback, parents=parents)
     if log_callback:
-        log_callback(f"[{timestamp()}] Se encontraron {len(all_folders)} carpetas raí­z.\n")
+        log_callback(f"[{timestamp()}] Se encontraron {len(all_folders)} carpetas raíz.\n")
 
     # --- NUEVO: mensaje si tarda mucho en pasar al siguiente paso ---
     time_after_folders = time.time()
@@ -205,31 +334,42 @@ def run_inventory(host, user, password, folders_input, output_file, log_callback
         if log_callback:
             log_callback(f"[{timestamp()}] Parece que esto se va a tardar un poco, hay un gran volumen de carpetas, no cierres nada, estamos trabajando! :)\n")
 
-    visited_folders = set()
-    api_map = {}
-    empty_folders = []
-
-    # Buscar carpeta raí­z que coincida con cada target_path
+    # Buscar carpeta raíz que coincida con cada target_path
+    matched_roots = []
     for tp in target_paths:
         matched_root = None
         for fname, fid in all_folders:
             if tp.startswith(fname):
                 matched_root = (fname, fid)
                 break
+        matched_roots.append((tp, matched_root))
+
+    # Total exacto: subárbol de las raíces elegidas según el folderId (padre) del mismo listado.
+    # Si el gateway no lo devuelve, se usa lo descubierto durante el recorrido.
+    root_ids = {m[1] for _, m in matched_roots if m}
+    PROGRESS.start_phase("carpetas", total=count_subtree(parents, root_ids) if parents else None,
+                         discovered=len(root_ids))
+    for tp, matched_root in matched_roots:
         if matched_root:
             traverse_folder(matched_root[1], matched_root[0], session, auth, visited_folders, api_map, empty_folders, log_callback)
         else:
             if log_callback:
-                log_callback(f"[{timestamp()}] No se encontró carpeta raí­z correspondiente para: {tp}\n")
+                log_callback(f"[{timestamp()}] No se encontró carpeta raíz correspondiente para: {tp}\n")
+    PROGRESS.finish_phase()
+    if log_callback:
+        log_callback(f"[{timestamp()}] {format_progress(PROGRESS.snapshot())}\n")
 
-    # Obtener resolution paths
+def collect_resolution_paths(session, auth, api_map, log_callback=None):
+    """Pide por RESTMAN el resolutionPath de los servicios que todavía no lo tienen"""
+    pending = [(api_id, info) for api_id, info in api_map.items() if "resolutionPath" not in info]
     if log_callback:
-        log_callback(f"[{timestamp()}] Obteniendo resolution paths para {len(api_map)} servicios...\n")
+        log_callback(f"[{timestamp()}] Obteniendo resolution paths para {len(pending)} servicios...\n")
     
-    total_services = len(api_map)
+    total_services = len(pending)
     processed = 0
+    PROGRESS.start_phase("resolution", total=total_services)
     
-    for api_id, info in api_map.items():
+    for api_id, info in pending:
         if CANCEL_EVENT.is_set():
             if log_callback:
                 log_callback(f"[{timestamp()}] Proceso cancelado durante obtención de resolution paths\n")
@@ -237,10 +377,62 @@ def run_inventory(host, user, password, folders_input, output_file, log_callback
             
         processed += 1
         if log_callback and processed % 10 == 0:  # Log cada 10 servicios
-            log_callback(f"[{timestamp()}] Progreso resolution paths: {processed}/{total_services}\n")
+            log_callback(f"[{timestamp()}] Progreso resolution paths: {processed}/{total_services} | {format_progress(PROGRESS.snapshot())}\n")
         
         resolution_path = get_service_resolution_path(api_id, session, auth, log_callback)
         info["resolutionPath"] = resolution_path
+        PROGRESS.step(services=1, new_services=False)
+    PROGRESS.finish_phase()
+
+def run_inventory(host, user, password, folders_input, output_file, log_callback, progress_callback=None,
+                  profile=False, profile_memory=False, engine="auto"):
+    """
+    engine: "auto" (prueba Graphman y si no responde usa RESTMAN), "graphman" o "restman".
+    progress_callback (opcional) recibe PROGRESS.snapshot() como mucho cada PROGRESS.min_interval
+    segundos; permite seguir fase, req/s, servicios/s y ETA sin GUI.
+    profile=True guarda cProfile, pilas colapsadas y (con profile_memory) top de asignaciones
+    junto al CSV (ver profiling.py).
+    """
+    with profile_run(output_file, enabled=profile, memory=profile_memory) as profiler:
+        result = _run_inventory(host, user, password, folders_input, output_file, log_callback, progress_callback, engine)
+    if profiler is not None and log_callback:
+        for pf in profiler.files:
+            log_callback(f"[{timestamp()}] Perfil guardado en {pf}\n")
+        if profiler.error:
+            log_callback(f"[{timestamp()}] Error guardando el perfil: {profiler.error}\n")
+    return result
+
+def _run_inventory(host, user, password, folders_input, output_file, log_callback, progress_callback=None, engine="auto"):
+    global hostname
+    CANCEL_EVENT.clear()
+    PROGRESS.reset(progress_callback)
+    hostname = host if host.startswith("http") else "https://" + host
+    target_paths = [f.strip() for f in folders_input.split(";") if f.strip()]
+
+    session = build_session()
+    auth = (user, password)
+
+    start_time = time.time()
+    visited_folders = set()
+    api_map = {}
+    empty_folders = []
+
+    if engine == "auto":
+        engine = probe_engine(session, auth, log_callback)
+    if log_callback:
+        log_callback(f"[{timestamp()}] Motor de inventario: {engine}\n")
+
+    restman_paths = target_paths
+    if engine == "graphman":
+        # Una llamada por carpeta; las que fallen se recorren por RESTMAN
+        restman_paths = collect_graphman(target_paths, session, auth, api_map, empty_folders, log_callback)
+        if restman_paths and log_callback:
+            log_callback(f"[{timestamp()}] {len(restman_paths)} carpetas se inventariarán por RESTMAN (fallback)\n")
+    if restman_paths and not CANCEL_EVENT.is_set():
+        collect_restman(restman_paths, session, auth, api_map, visited_folders, empty_folders, log_callback)
+    # Servicios de RESTMAN y SOAP de Graphman
+    if not CANCEL_EVENT.is_set() and any("resolutionPath" not in info for info in api_map.values()):
+        collect_resolution_paths(session, auth, api_map, log_callback)
 
     try:
         with open(output_file, "w", newline="", encoding="utf-8") as f:
@@ -251,7 +443,7 @@ def run_inventory(host, user, password, folders_input, output_file, log_callback
             # Guardar APIs finales en CSV
             for api_id, info in api_map.items():
                 writer.writerow({
-                    "folderPath": info["folderPath"], 
+                    "folderPath": normalize_folder_path(info["folderPath"]), 
                     "serviceName": info["serviceName"], 
                     "serviceId": api_id,
                     "resolutionPath": info.get("resolutionPath", "N/A")
@@ -269,8 +461,16 @@ def run_inventory(host, user, password, folders_input, output_file, log_callback
             logf.write(f"Fin: {datetime.now().strftime('%d-%m-%Y %H:%M:%S')}\n")
             logf.write(f"Duración: {elapsed:.2f} segundos\n")
             logf.write(f"Archivo CSV: {output_file}\n")
-            logf.write(f"Carpetas procesadas: {len(visited_folders)}\n")
+            logf.write(f"Motor: {engine}\n")
+            graphman_folders = len(target_paths) - len(restman_paths) if engine == "graphman" else 0
+            logf.write(f"Carpetas procesadas: {len(visited_folders) + graphman_folders}\n")
             logf.write(f"APIs únicas encontradas: {len(api_map)}\n")
+            logf.write(f"Peticiones realizadas: {PROGRESS.requests}\n")
+            logf.write(f"Transporte: {format_stats(session.stats())}\n")
+            for ph in PROGRESS.phases:
+                ph_elapsed = (ph["end"] or time.monotonic()) - ph["start"]
+                ph_rate = ph["requests"] / ph_elapsed if ph_elapsed > 0 else 0.0
+                logf.write(f"Fase {ph['name']}: {ph['done']} elementos, {ph['requests']} peticiones, {ph_elapsed:.2f} s ({ph_rate:.1f} req/s)\n")
             logf.write("Carpetas vací­as detectadas:\n")
             for ef in empty_folders:
                 logf.write(f" - {ef}\n")
@@ -278,6 +478,7 @@ def run_inventory(host, user, password, folders_input, output_file, log_callback
         pass
 
     if log_callback:
+        log_callback(f"[{timestamp()}] Transporte: {format_stats(session.stats())}\n")
         log_callback(f"[{timestamp()}] Inventario completado. Guardado en {output_file}\n")
         log_callback(f"[{timestamp()}] Log guardado en {log_file}\n")
 
@@ -285,13 +486,13 @@ def run_inventory(host, user, password, folders_input, output_file, log_callback
 
 def test_connection(host, user, password, timeout=8):
     hosturl = host if host.startswith("http") else "https://" + host
-    session = requests.Session()
-    try:
-        resp = session.get(f"{hosturl}/restman/1.0/folders", auth=(user,password), verify=False, timeout=timeout)
-        resp.raise_for_status()
-        return True, None
-    except requests.exceptions.RequestException as e:
-        return False, str(e)
+    with build_session(retries=0) as session:
+        try:
+            resp = session.get(f"{hosturl}/restman/1.0/folders", auth=(user,password), verify=False, timeout=timeout)
+            resp.raise_for_status()
+            return True, None
+        except requests.exceptions.RequestException as e:
+            return False, str(e)
 
 # =========================
 # GUI
@@ -409,6 +610,11 @@ def build_gui():
 
     ttk.Button(frame_cfg, text="Seleccionar...", command=choose_output).grid(row=4, column=2, padx=6, pady=4)
 
+    ttk.Label(frame_cfg, text="Motor:").grid(row=5, column=0, sticky="e", padx=4, pady=4)
+    engine_combo = ttk.Combobox(frame_cfg, values=["auto", "graphman", "restman"], width=12, state="readonly")
+    engine_combo.set("auto")
+    engine_combo.grid(row=5, column=1, sticky="w", padx=4, pady=4)
+
     # --- Botones ---
     frame_actions = ttk.Frame(root)
     frame_actions.pack(fill="x", padx=8, pady=(0,8))
@@ -419,8 +625,30 @@ def build_gui():
     btn_test.grid(row=0, column=0, padx=6, pady=6)
     btn_start.grid(row=0, column=1, padx=6, pady=6)
     btn_cancel.grid(row=0, column=2, padx=6, pady=6)
+    var_profile = tk.BooleanVar(value=False)
+    var_profile_memory = tk.BooleanVar(value=False)
+    ttk.Checkbutton(frame_actions, text="Perfilar", variable=var_profile).grid(row=0, column=3, padx=6, pady=6)
+    ttk.Checkbutton(frame_actions, text="Perfilar memoria", variable=var_profile_memory).grid(row=0, column=4, padx=6, pady=6)
     btn_cancel.state(["disabled"])
 
+    # --- Progreso ---
+    frame_progress = ttk.Frame(root)
+    frame_progress.pack(fill="x", padx=8, pady=(0,4))
+    progress_bar = ttk.Progressbar(frame_progress, mode="determinate", maximum=100)
+    progress_bar.pack(fill="x")
+    lbl_progress = ttk.Label(frame_progress, text="", anchor="w")
+    lbl_progress.pack(fill="x")
+
+    # Se refresca desde el hilo de Tk leyendo PROGRESS, nunca desde el hilo del inventario
+    PROGRESS_REFRESH_MS = 250
+
+    def refresh_progress(worker):
+        snap = PROGRESS.snapshot()
+        progress_bar["value"] = snap["percent"]
+        lbl_progress.configure(text=format_progress(snap))
+        if worker.is_alive():
+            root.after(PROGRESS_REFRESH_MS, refresh_progress, worker)
+
     # --- Consola ---
     frame_console = ttk.LabelFrame(root, text="Consola (logs)", padding=(6,6,6,6))
     frame_console.pack(fill="both", expand=True, padx=8, pady=6)
@@ -479,8 +707,13 @@ def build_gui():
         btn_cancel.state(["!disabled"])
         CANCEL_EVENT.clear()
 
+        profile = var_profile.get()
+        profile_memory = var_profile_memory.get()
+        engine = engine_combo.get()
+
         def target():
-            ok, runtime_log = run_inventory(host, user, password, folders, output_file, log_callback=gui_log)
+            ok, runtime_log = run_inventory(host, user, password, folders, output_file, log_callback=gui_log,
+                                            profile=profile, profile_memory=profile_memory, engine=engine)
             if ok:
                 gui_log(f"[{timestamp()}] Inventario finalizado.\n")
                 messagebox.showinfo("Inventario", f"Inventario guardado en:\n{output_file}")
@@ -493,6 +726,8 @@ def build_gui():
 
         t = threading.Thread(target=target, daemon=True)
         t.start()
+        progress_bar["value"] = 0
+        root.after(PROGRESS_REFRESH_MS, refresh_progress, t)
 
     def on_cancel():
         if messagebox.askyesno("Cancelar", "¿Desea cancelar el inventario?"):
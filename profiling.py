@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# profiling.py
+"""
+Modo perfilado para RestGUI y GraphGUI: cProfile + muestreo de pila (wall-clock) + tracemalloc opcional.
+Los resultados se guardan junto al CSV del inventario:
+  <base>_profile.pstats     -> cProfile (abrir con pstats, snakeviz, etc.)
+  <base>_profile.txt        -> top funciones por tiempo acumulado
+  <base>_profile.collapsed  -> pilas colapsadas para flamegraph.pl / speedscope
+  <base>_profile_alloc.txt  -> top asignaciones de memoria (solo con memory=True)
+Sin activar no se instala nada: profile_run devuelve un contexto vacío.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import nullcontext
+
+
+class StackSampler:
+    """Muestrea cada `interval` segundos la pila del hilo indicado (incluye esperas de red)"""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="StackSampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def write_collapsed(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    def __init__(self, output_base, sample_interval=0.005, memory=False, top=30):
+        self.output_base = output_base
+        self.sample_interval = sample_interval
+        self.memory = memory
+        self.top = top
+        self.files = []
+        self.error = None
+        self._profile = None
+        self._sampler = None
+        self._started_tracemalloc = False
+
+    def __enter__(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._sampler = StackSampler(threading.get_ident(), self.sample_interval)
+        self._sampler.start()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._profile.disable()
+        self._sampler.stop()
+        alloc_snapshot = None
+        current = peak = 0
+        if self.memory and tracemalloc.is_tracing():
+            alloc_snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+        try:
+            self._write(alloc_snapshot, current, peak)
+        except OSError as e:
+            # No interrumpe el inventario; el llamador lo muestra en el log
+            self.error = e
+        return False
+
+    def _write(self, alloc_snapshot, current, peak):
+        base = self.output_base
+        pstats_file = base + "_profile.pstats"
+        self._profile.dump_stats(pstats_file)
+        self.files.append(pstats_file)
+
+        summary_file = base + "_profile.txt"
+        buf = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=buf)
+        stats.sort_stats("cumulative").print_stats(self.top)
+        with open(summary_file, "w", encoding="utf-8") as f:
+            f.write(buf.getvalue())
+        self.files.append(summary_file)
+
+        collapsed_file = base + "_profile.collapsed"
+        self._sampler.write_collapsed(collapsed_file)
+        self.files.append(collapsed_file)
+
+        if alloc_snapshot is not None:
+            alloc_file = base + "_profile_alloc.txt"
+            with open(alloc_file, "w", encoding="utf-8") as f:
+                f.write(f"Memoria trazada actual: {current / 1024:.1f} KiB, pico: {peak / 1024:.1f} KiB\n")
+                f.write(f"Top {self.top} asignaciones por línea:\n")
+                for stat in alloc_snapshot.statistics("lineno")[:self.top]:
+                    f.write(f" - {stat}\n")
+            self.files.append(alloc_file)
+
+
+def profile_run(output_file, enabled=False, memory=False, sample_interval=0.005):
+    """Contexto de perfilado para una ejecución; memory=True implica enabled. Desactivado no tiene coste"""
+    if not (enabled or memory):
+        return nullcontext()
+    return Profiler(os.path.splitext(output_file)[0], sample_interval=sample_interval, memory=memory)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# progress.py
+"""
+Progreso compartido para RestGUI y GraphGUI: throughput, ETA y estimación de trabajo total.
+Sin dependencias externas (solo stdlib), se puede usar también en ejecuciones sin GUI.
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class ProgressTracker:
+    """
+    Lleva la cuenta de peticiones, carpetas y servicios por fase ("carpetas", "resolution", ...).
+
+    - El total de una fase puede ser exacto (total), p.ej. el subárbol calculado con count_subtree
+      a partir de get_all_folders, o, si no se conoce, lo descubierto hasta ahora (discover).
+      La estimación nunca baja: solo crece a medida que se descubren elementos.
+    - Las tasas (req/s, servicios/s) se calculan sobre una ventana deslizante de `window` segundos.
+    - Si se pasa un callback, se llama con snapshot() como máximo cada `min_interval` segundos.
+    """
+
+    def __init__(self, callback=None, min_interval=0.5, window=10.0, clock=time.monotonic):
+        self._lock = threading.Lock()
+        self._clock = clock
+        self.min_interval = min_interval
+        self.window = window
+        self.reset(callback)
+
+    def reset(self, callback=None):
+        with self._lock:
+            self.callback = callback
+            self.run_start = self._clock()
+            self.requests = 0
+            self.services = 0
+            self.phase = None
+            self.phases = []
+            self._samples = deque()
+            self._last_notify = 0.0
+
+    # --- Fases ---
+    def start_phase(self, name, total=None, discovered=0):
+        with self._lock:
+            now = self._clock()
+            self.phase = {
+                "name": name,
+                "start": now,
+                "end": None,
+                "done": 0,
+                "total": total,
+                "discovered": discovered,
+                "requests": 0,
+                "services": 0,
+            }
+            self.phases.append(self.phase)
+            self._samples.clear()
+            self._samples.append((now, 0, 0, 0))
+        self._notify(force=True)
+
+    def finish_phase(self):
+        with self._lock:
+            if self.phase is not None and self.phase["end"] is None:
+                self.phase["end"] = self._clock()
+        self._notify(force=True)
+
+    # --- Contadores ---
+    def request(self, n=1):
+        with self._lock:
+            self.requests += n
+            # Las peticiones entre fases (p.ej. get_all_folders tras el fallback) no son de la fase cerrada
+            if self.phase is not None and self.phase["end"] is None:
+                self.phase["requests"] += n
+        self._notify()
+
+    def discover(self, n):
+        with self._lock:
+            if self.phase is not None:
+                self.phase["discovered"] += n
+
+    def step(self, n=1, services=0, new_services=True):
+        """
+        Marca n elementos hechos. new_services=False para servicios ya contados en otra fase
+        (p.ej. al pedir su resolutionPath): suman al throughput de la fase pero no al total.
+        """
+        with self._lock:
+            if new_services:
+                self.services += services
+            if self.phase is not None:
+                self.phase["done"] += n
+                self.phase["services"] += services
+        self._notify()
+
+    # --- Estimaciones ---
+    def _estimated_total(self, ph):
+        # Sin total exacto no se proyecta: lo descubierto es una cota inferior que solo crece
+        if ph["total"] is not None:
+            return max(ph["total"], ph["done"])
+        return max(ph["discovered"], ph["done"])
+
+    def _rates(self, now):
+        # Se llama con el lock tomado
+        ph = self.phase
+        self._samples.append((now, ph["requests"], ph["services"], ph["done"]))
+        while len(self._samples) > 2 and now - self._samples[0][0] > self.window:
+            self._samples.popleft()
+        t0, r0, s0, d0 = self._samples[0]
+        dt = now - t0
+        if dt <= 0:
+            return 0.0, 0.0, 0.0
+        return (ph["requests"] - r0) / dt, (ph["services"] - s0) / dt, (ph["done"] - d0) / dt
+
+    def snapshot(self):
+        with self._lock:
+            now = self._clock()
+            snap = {
+                "phase": None,
+                "done": 0,
+                "total": 0,
+                "percent": 0.0,
+                "requests": self.requests,
+                "services": self.services,
+                "req_per_s": 0.0,
+                "services_per_s": 0.0,
+                "eta": None,
+                "phase_elapsed": 0.0,
+                "elapsed": now - self.run_start,
+                "finished": False,
+            }
+            ph = self.phase
+            if ph is None:
+                return snap
+            end = ph["end"] if ph["end"] is not None else now
+            total = self._estimated_total(ph)
+            if ph["end"] is not None:
+                total = ph["done"]
+                req_s = ph["requests"] / (end - ph["start"]) if end > ph["start"] else 0.0
+                srv_s = ph["services"] / (end - ph["start"]) if end > ph["start"] else 0.0
+                eta = 0.0
+            else:
+                req_s, srv_s, items_s = self._rates(now)
+                remaining = max(total - ph["done"], 0)
+                eta = remaining / items_s if items_s > 0 else None
+            snap.update({
+                "phase": ph["name"],
+                "done": ph["done"],
+                "total": total,
+                "percent": min(100.0 * ph["done"] / total, 100.0) if total else (100.0 if ph["end"] is not None else 0.0),
+                "req_per_s": req_s,
+                "services_per_s": srv_s,
+                "eta": eta,
+                "phase_elapsed": end - ph["start"],
+                "finished": ph["end"] is not None,
+            })
+            return snap
+
+    def _notify(self, force=False):
+        callback = self.callback
+        if callback is None:
+            return
+        now = self._clock()
+        with self._lock:
+            if not force and now - self._last_notify < self.min_interval:
+                return
+            self._last_notify = now
+        try:
+            callback(self.snapshot())
+        except Exception:
+            pass
+
+
+def count_subtree(parents, root_ids):
+    """
+    Número de carpetas bajo root_ids (incluidas) a partir de {id: id_padre}, como el listado
+    de /restman/1.0/folders. Las raíces que se solapan se cuentan una sola vez.
+    """
+    children = {}
+    for folder_id, parent_id in parents.items():
+        children.setdefault(parent_id, []).append(folder_id)
+    seen = set()
+    stack = list(root_ids)
+    while stack:
+        folder_id = stack.pop()
+        if folder_id in seen:
+            continue
+        seen.add(folder_id)
+        stack.extend(children.get(folder_id, ()))
+    return len(seen)
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h:d}:{m:02d}:{s:02d}" if h else f"{m:02d}:{s:02d}"
+
+
+def format_progress(snap):
+    """Línea de texto con el estado actual, igual para GUI y ejecuciones sin GUI"""
+    if snap["phase"] is None:
+        return "Esperando..."
+    return (f"{snap['phase']}: {snap['done']}/{snap['total']} ({snap['percent']:.1f}%) | "
+            f"{snap['req_per_s']:.1f} req/s | {snap['services_per_s']:.1f} servicios/s | "
+            f"ETA {format_eta(snap['eta'])}")
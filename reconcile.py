@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# reconcile.py
+"""
+Conciliación de inventarios RESTMAN (RestGUI) y Graphman (GraphGUI).
+
+Une ambos CSV por (folderPath, name) normalizados con un hash join en streaming y compara el
+resolutionPath. Si alguno de los inventarios no cabe en memoria (--memory-rows) ambos lados se
+particionan en disco por hash de la clave y se concilia partición a partición; las particiones
+que siguen sin caber se vuelven a particionar.
+Las filas Graphman repetidas (carpetas solapadas en GraphGUI) se cuentan como duplicadas y no
+se informan como diferencias.
+
+Uso:
+    python reconcile.py inventario_rest.csv inventario_graph.csv -o conciliacion.csv
+Requisitos: solo Python 3.8+ (stdlib)
+"""
+
+import argparse
+import csv
+import itertools
+import math
+import os
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime
+
+DEFAULT_MEMORY_ROWS = 500000
+MAX_PARTITIONS = 256
+MAX_PARTITION_LEVELS = 3
+FOLDER_CACHE_SIZE = 100000
+
+REPORT_FIELDS = ["status", "folderPath", "name", "resolutionPath_restman", "resolutionPath_graphman", "serviceId"]
+MISSING_IN_GRAPHMAN = "solo_restman"
+MISSING_IN_RESTMAN = "solo_graphman"
+MISMATCH = "resolutionPath_distinto"
+
+
+def timestamp():
+    return datetime.now().strftime("%d-%m-%Y %H:%M:%S")
+
+def normalize_folder_path(path):
+    # Igual que RestGUI.normalize_folder_path, más barras duplicadas; camino rápido si ya está normalizado
+    if path[:1] == "/" and path[-1:] != "/" and "//" not in path and path == path.strip():
+        return path
+    return "/" + "/".join(p for p in path.strip().split("/") if p)
+
+def normalize_resolution_path(path):
+    path = (path or "").strip()
+    return "" if path == "N/A" else path
+
+def read_inventory(path):
+    """
+    Genera (folderPath, name, resolutionPath, serviceId) normalizados desde un CSV de RestGUI
+    (folderPath, serviceName, serviceId, resolutionPath) o de GraphGUI (folderPath, name, resolutionPath).
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        cols = {name: idx for idx, name in enumerate(header)}
+        i_folder = cols.get("folderPath")
+        i_name = cols.get("serviceName", cols.get("name"))
+        i_res = cols.get("resolutionPath")
+        i_id = cols.get("serviceId")
+        if i_folder is None or i_name is None:
+            raise ValueError(f"{path}: faltan columnas folderPath y serviceName/name")
+        # Muchos servicios comparten carpeta: se normaliza cada folderPath una sola vez
+        folders = {}
+        needed = max(i_folder, i_name)
+        for row in reader:
+            if not row:
+                continue
+            if len(row) <= needed:
+                raise ValueError(f"{path}:{reader.line_num}: fila incompleta ({len(row)} columnas)")
+            folder = folders.get(row[i_folder])
+            if folder is None:
+                if len(folders) >= FOLDER_CACHE_SIZE:
+                    folders.clear()
+                folder = folders[row[i_folder]] = normalize_folder_path(row[i_folder])
+            yield (folder,
+                   row[i_name].strip(),
+                   normalize_resolution_path(row[i_res]) if i_res is not None and i_res < len(row) else "",
+                   row[i_id] if i_id is not None and i_id < len(row) else "")
+
+def partition_of(folder, name, partitions, level=0):
+    # El nivel forma parte del hash para que al reparticionar las filas se repartan de nuevo
+    return zlib.crc32(f"{level}\x00{folder}\x00{name}".encode("utf-8")) % partitions
+
+
+class Reconciler:
+    def __init__(self, writer):
+        self.writer = writer
+        self.counts = {"restman": 0, "graphman": 0, "ok": 0, "duplicados_graphman": 0,
+                       MISSING_IN_GRAPHMAN: 0, MISSING_IN_RESTMAN: 0, MISMATCH: 0}
+
+    def report(self, status, folder, name, res_rest="", res_graph="", service_id=""):
+        self.counts[status] += 1
+        self.writer.writerow([status, folder, name, res_rest, res_graph, service_id])
+
+    def join(self, build, probe_rows):
+        """
+        build: dict (folderPath, name) -> lista de (resolutionPath, serviceId) del lado RESTMAN.
+        probe_rows: filas Graphman en streaming. Las coincidencias exactas se descartan al vuelo;
+        el resto se empareja al final por clave para que el orden de las filas no influya.
+        Una fila Graphman idéntica a otra ya vista se cuenta como duplicada; los conjuntos de
+        filas vistas crecen con probe_rows, que _join_partitioned limita a memory_rows.
+        """
+        deferred = {}
+        matched = set()
+        missing = set()
+        for folder, name, res, _ in probe_rows:
+            self.counts["graphman"] += 1
+            key = (folder, name)
+            entries = build.get(key)
+            if entries is None:
+                if (key, res) in matched or (key, res) in missing:
+                    self.counts["duplicados_graphman"] += 1
+                else:
+                    missing.add((key, res))
+                    self.report(MISSING_IN_RESTMAN, folder, name, res_graph=res)
+                continue
+            for i, (res_rest, _) in enumerate(entries):
+                if res_rest == res:
+                    del entries[i]
+                    matched.add((key, res))
+                    self.counts["ok"] += 1
+                    break
+            else:
+                pending = deferred.setdefault(key, [])
+                if (key, res) in matched or res in pending:
+                    self.counts["duplicados_graphman"] += 1
+                else:
+                    pending.append(res)
+                continue
+            if not entries and key not in deferred:
+                del build[key]
+
+        for key, entries in build.items():
+            pending = deferred.get(key, [])
+            for j, (res_rest, service_id) in enumerate(entries):
+                if j < len(pending):
+                    self.report(MISMATCH, key[0], key[1], res_rest, pending[j], service_id)
+                else:
+                    self.report(MISSING_IN_GRAPHMAN, key[0], key[1], res_rest=res_rest, service_id=service_id)
+            for res in pending[len(entries):]:
+                self.report(MISSING_IN_RESTMAN, key[0], key[1], res_graph=res)
+
+
+def _build(rows, limit):
+    """Carga hasta `limit` filas en la tabla hash; devuelve (tabla, filas, bytes aprox, siguiente fila o None)"""
+    build = {}
+    loaded = 0
+    approx_bytes = 0
+    for row in rows:
+        if loaded >= limit:
+            return build, loaded, approx_bytes, row
+        folder, name, res, service_id = row
+        build.setdefault((folder, name), []).append((res, service_id))
+        loaded += 1
+        approx_bytes += len(folder) + len(name) + len(res) + len(service_id) + 4
+    return build, loaded, approx_bytes, None
+
+def _spill(rows, tmpdir, prefix, partitions, level):
+    files = [open(os.path.join(tmpdir, f"{prefix}_{p}.csv"), "w", newline="", encoding="utf-8") for p in range(partitions)]
+    try:
+        writers = [csv.writer(f) for f in files]
+        for row in rows:
+            writers[partition_of(row[0], row[1], partitions, level)].writerow(row)
+    finally:
+        for f in files:
+            f.close()
+
+def _read_partition(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            yield tuple(row)
+
+def _build_rows(build):
+    for key, entries in build.items():
+        for res, service_id in entries:
+            yield key[0], key[1], res, service_id
+
+def _join_partitioned(rec, rest_rows, graph_rows, rest_size, graph_size, memory_rows, tmpdir, level=0, log_callback=None):
+    """
+    Hash join con memoria acotada: si alguno de los dos lados supera memory_rows, ambos se
+    particionan en disco y cada partición se concilia igual (nivel siguiente). Así tanto la tabla
+    RESTMAN como las filas Graphman vistas en join() caben en memory_rows por partición.
+    Devuelve el número de particiones escritas.
+    """
+    build, loaded, approx_bytes, overflow = _build(rest_rows, memory_rows)
+    graph_head = list(itertools.islice(graph_rows, memory_rows + 1))
+    if overflow is None and len(graph_head) <= memory_rows:
+        rec.counts["restman"] += loaded
+        rec.join(build, graph_head)
+        return 0
+    if level >= MAX_PARTITION_LEVELS:
+        # Solo pasa si una misma clave (folderPath, name) tiene más de memory_rows filas
+        if log_callback:
+            log_callback(f"[{timestamp()}] Aviso: una partición sigue superando {memory_rows} filas tras {level} niveles; se carga entera y no se respeta el límite de memoria\n")
+        if overflow is not None:
+            for folder, name, res, service_id in itertools.chain([overflow], rest_rows):
+                build.setdefault((folder, name), []).append((res, service_id))
+                loaded += 1
+        rec.counts["restman"] += loaded
+        rec.join(build, itertools.chain(graph_head, graph_rows))
+        return 0
+
+    # Estimar filas totales de cada lado por tamaño en disco para elegir el número de particiones
+    est_rest = rest_size / max(approx_bytes / max(loaded, 1), 1) if overflow is not None else loaded
+    graph_bytes = sum(len(folder) + len(name) + len(res) + len(service_id) + 4 for folder, name, res, service_id in graph_head)
+    est_graph = graph_size / max(graph_bytes / max(len(graph_head), 1), 1) if len(graph_head) > memory_rows else len(graph_head)
+    partitions = min(MAX_PARTITIONS, max(2, math.ceil(2 * max(est_rest, est_graph) / memory_rows)))
+    if log_callback and level == 0:
+        side = "RESTMAN" if overflow is not None else "Graphman"
+        log_callback(f"[{timestamp()}] El inventario {side} supera {memory_rows} filas, particionando en {partitions} ficheros temporales...\n")
+    subdir = tempfile.mkdtemp(dir=tmpdir)
+    _spill(itertools.chain(_build_rows(build), [overflow] if overflow is not None else [], rest_rows),
+           subdir, "restman", partitions, level)
+    build.clear()
+    _spill(itertools.chain(graph_head, graph_rows), subdir, "graphman", partitions, level)
+    graph_head.clear()
+
+    written = partitions
+    for p in range(partitions):
+        rest_path = os.path.join(subdir, f"restman_{p}.csv")
+        graph_path = os.path.join(subdir, f"graphman_{p}.csv")
+        written += _join_partitioned(rec, _read_partition(rest_path), _read_partition(graph_path),
+                                     os.path.getsize(rest_path), os.path.getsize(graph_path),
+                                     memory_rows, tmpdir, level + 1, log_callback)
+        os.remove(rest_path)
+        os.remove(graph_path)
+    return written
+
+def reconcile(restman_csv, graphman_csv, report_csv, memory_rows=DEFAULT_MEMORY_ROWS, log_callback=None):
+    """Concilia ambos inventarios y escribe el informe; devuelve los contadores"""
+    start_time = time.time()
+    with open(report_csv, "w", newline="", encoding="utf-8") as out:
+        writer = csv.writer(out)
+        writer.writerow(REPORT_FIELDS)
+        rec = Reconciler(writer)
+        with tempfile.TemporaryDirectory(prefix="reconcile_") as tmpdir:
+            partitions = _join_partitioned(rec, read_inventory(restman_csv), read_inventory(graphman_csv),
+                                           os.path.getsize(restman_csv), os.path.getsize(graphman_csv),
+                                           memory_rows, tmpdir, log_callback=log_callback)
+
+    counts = dict(rec.counts)
+    counts["partitions"] = partitions
+    counts["elapsed"] = time.time() - start_time
+    if log_callback:
+        log_callback(f"[{timestamp()}] Conciliación completada en {counts['elapsed']:.2f} segundos. Informe en {report_csv}\n")
+        log_callback(f"[{timestamp()}] RESTMAN: {counts['restman']} | Graphman: {counts['graphman']} (duplicadas: {counts['duplicados_graphman']}) | Coinciden: {counts['ok']}\n")
+        log_callback(f"[{timestamp()}] Solo RESTMAN: {counts[MISSING_IN_GRAPHMAN]} | Solo Graphman: {counts[MISSING_IN_RESTMAN]} | resolutionPath distinto: {counts[MISMATCH]}\n")
+    return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concilia inventarios de RestGUI (RESTMAN) y GraphGUI (Graphman)")
+    parser.add_argument("restman_csv", help="CSV generado por RestGUI")
+    parser.add_argument("graphman_csv", help="CSV generado por GraphGUI")
+    parser.add_argument("-o", "--output", default=None, help="CSV de informe (por defecto conciliacion_<fecha>.csv)")
+    parser.add_argument("--memory-rows", type=int, default=DEFAULT_MEMORY_ROWS,
+                        help=f"filas de cada inventario en memoria antes de particionar a disco (por defecto {DEFAULT_MEMORY_ROWS})")
+    args = parser.parse_args(argv)
+    if args.memory_rows < 1:
+        parser.error("--memory-rows debe ser mayor que 0")
+
+    for path in (args.restman_csv, args.graphman_csv):
+        if not os.path.isfile(path):
+            sys.stderr.write(f"[{timestamp()}] Error: no existe el fichero {path}\n")
+            return 2
+
+    output = args.output or f"conciliacion_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    try:
+        counts = reconcile(args.restman_csv, args.graphman_csv, output, memory_rows=args.memory_rows,
+                           log_callback=sys.stdout.write)
+    except (OSError, ValueError) as e:
+        sys.stderr.write(f"[{timestamp()}] Error: {e}\n")
+        return 2
+    differences = counts[MISSING_IN_GRAPHMAN] + counts[MISSING_IN_RESTMAN] + counts[MISMATCH]
+    return 1 if differences else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
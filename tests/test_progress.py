@@ -0,0 +1,100 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from progress import ProgressTracker, count_subtree
+
+
+def binary_tree(depth):
+    """{id: id_padre} de un árbol binario completo; la raíz es 1"""
+    parents = {}
+    for folder_id in range(2, 2 ** depth):
+        parents[folder_id] = folder_id // 2
+    return parents
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def dfs(tracker, clock, parents, folder_id, snapshots):
+    """Recorre como traverse_folder: descubre hijos, marca la carpeta y baja en profundidad"""
+    children = [f for f, p in parents.items() if p == folder_id]
+    clock.now += 1.0
+    tracker.discover(len(children))
+    tracker.step()
+    snapshots.append(tracker.snapshot())
+    for child in children:
+        dfs(tracker, clock, parents, child, snapshots)
+
+
+class ProgressTrackerDfsTest(unittest.TestCase):
+    def setUp(self):
+        # Gateway grande (3000 carpetas) del que solo se recorre un subárbol de 31
+        self.parents = binary_tree(5)
+        for folder_id in range(100, 3100):
+            self.parents[folder_id] = 0
+        self.clock = FakeClock()
+        self.tracker = ProgressTracker(clock=self.clock, window=1000.0)
+
+    def run_dfs(self, total):
+        self.tracker.start_phase("carpetas", total=total, discovered=1)
+        snapshots = []
+        dfs(self.tracker, self.clock, self.parents, 1, snapshots)
+        return snapshots
+
+    def test_count_subtree_ignores_rest_of_gateway(self):
+        self.assertEqual(count_subtree(self.parents, {1}), 31)
+        self.assertEqual(count_subtree(self.parents, {2, 4}), 15)
+
+    def test_exact_total_is_monotonic(self):
+        snapshots = self.run_dfs(count_subtree(self.parents, {1}))
+        percents = [s["percent"] for s in snapshots]
+        self.assertEqual(percents, sorted(percents))
+        self.assertTrue(all(s["total"] == 31 for s in snapshots))
+        self.assertEqual(percents[-1], 100.0)
+        etas = [s["eta"] for s in snapshots[1:]]
+        self.assertEqual(etas, sorted(etas, reverse=True))
+        self.assertEqual(etas[-1], 0.0)
+
+    def test_estimate_without_total_never_shrinks(self):
+        snapshots = self.run_dfs(None)
+        totals = [s["total"] for s in snapshots]
+        self.assertEqual(totals, sorted(totals))
+        self.assertLessEqual(max(totals), 31)
+        self.assertEqual(snapshots[-1]["percent"], 100.0)
+
+
+class ProgressTrackerPhasesTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.tracker = ProgressTracker(clock=self.clock)
+
+    def test_services_counted_once_across_phases(self):
+        self.tracker.start_phase("carpetas", total=1)
+        self.tracker.step(services=3)
+        self.tracker.finish_phase()
+        self.tracker.start_phase("resolution", total=3)
+        for _ in range(3):
+            self.clock.now += 1.0
+            self.tracker.step(services=1, new_services=False)
+        self.assertEqual(self.tracker.snapshot()["services"], 3)
+        self.assertEqual(self.tracker.phase["services"], 3)
+
+    def test_requests_after_finish_are_not_added_to_closed_phase(self):
+        self.tracker.start_phase("carpetas", total=2)
+        self.tracker.request(2)
+        self.tracker.finish_phase()
+        self.tracker.request()
+        self.assertEqual(self.tracker.phases[0]["requests"], 2)
+        self.assertEqual(self.tracker.requests, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
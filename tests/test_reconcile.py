@@ -0,0 +1,128 @@
+import contextlib
+import csv
+import io
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reconcile
+
+REST_HEADER = ["folderPath", "serviceName", "serviceId", "resolutionPath"]
+GRAPH_HEADER = ["folderPath", "name", "resolutionPath"]
+
+
+def write_csv(path, header, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def read_report(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    return rows[0], sorted(rows[1:])
+
+
+def sample_inventories(seed=7, services=60):
+    """Inventarios con coincidencias, diferencias, claves repetidas y filas Graphman duplicadas"""
+    rnd = random.Random(seed)
+    rest, graph = [], []
+    for i in range(services):
+        folder = f"/f{i % 7}"
+        name = f"s{i % 40}"  # nombres repetidos en la misma carpeta
+        res = f"/api/{i}"
+        kind = rnd.choice(["ok", "ok", "mismatch", "solo_rest", "solo_graph", "dup"])
+        if kind != "solo_graph":
+            rest.append([folder, name, f"id{i}", res])
+        if kind == "ok":
+            graph.append([folder + "/", name, res])
+        elif kind == "mismatch":
+            graph.append([folder, name, res + "/v2"])
+        elif kind == "solo_graph":
+            graph.append([folder, name, res])
+        elif kind == "dup":
+            graph.extend([[folder, name, res]] * 3)
+    rnd.shuffle(graph)
+    return rest, graph
+
+
+class ReconcileTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.rest_csv = os.path.join(self.tmp, "rest.csv")
+        self.graph_csv = os.path.join(self.tmp, "graph.csv")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def run_reconcile(self, memory_rows=reconcile.DEFAULT_MEMORY_ROWS):
+        report = os.path.join(self.tmp, f"report_{memory_rows}.csv")
+        counts = reconcile.reconcile(self.rest_csv, self.graph_csv, report, memory_rows=memory_rows)
+        return counts, read_report(report)
+
+    def test_partitioned_matches_in_memory(self):
+        rest, graph = sample_inventories()
+        write_csv(self.rest_csv, REST_HEADER, rest)
+        write_csv(self.graph_csv, GRAPH_HEADER, graph)
+        counts, report = self.run_reconcile()
+        self.assertEqual(counts["partitions"], 0)
+        self.assertEqual(report[0], reconcile.REPORT_FIELDS)
+        for memory_rows in (1, 2, 3):
+            with self.subTest(memory_rows=memory_rows):
+                part_counts, part_report = self.run_reconcile(memory_rows)
+                self.assertGreater(part_counts["partitions"], 0)
+                for key in ("restman", "graphman", "ok", "duplicados_graphman", reconcile.MISSING_IN_GRAPHMAN,
+                            reconcile.MISSING_IN_RESTMAN, reconcile.MISMATCH):
+                    self.assertEqual(part_counts[key], counts[key], key)
+                self.assertEqual(part_report, report)
+
+    def test_graphman_side_alone_triggers_partitioning(self):
+        write_csv(self.rest_csv, REST_HEADER, [["/a", "s0", "id0", "/x0"]])
+        write_csv(self.graph_csv, GRAPH_HEADER, [[f"/f{i % 3}", f"s{i}", f"/x{i}"] for i in range(50)])
+        counts, _ = self.run_reconcile(memory_rows=5)
+        self.assertGreater(counts["partitions"], 0)
+        self.assertEqual(counts[reconcile.MISSING_IN_RESTMAN], 50)
+        self.assertEqual(counts[reconcile.MISSING_IN_GRAPHMAN], 1)
+
+    def test_duplicate_graphman_rows_not_reported(self):
+        write_csv(self.rest_csv, REST_HEADER, [["/a", "s1", "id1", "/x1"], ["/a", "s2", "id2", "/x2"]])
+        write_csv(self.graph_csv, GRAPH_HEADER, [
+            ["/a", "s1", "/x1"], ["/a/", "s1", "/x1"],           # coincide y se repite
+            ["/a", "s2", "/otro"], ["/a", "s2", "/otro"],        # diferencia repetida
+            ["/b", "s3", "/x3"], ["/b", "s3", "/x3"],            # solo Graphman repetida
+        ])
+        for memory_rows in (reconcile.DEFAULT_MEMORY_ROWS, 1):
+            with self.subTest(memory_rows=memory_rows):
+                counts, (_, rows) = self.run_reconcile(memory_rows)
+                self.assertEqual(counts["duplicados_graphman"], 3)
+                self.assertEqual(counts["ok"], 1)
+                self.assertEqual(rows, [
+                    [reconcile.MISMATCH, "/a", "s2", "/x2", "/otro", "id2"],
+                    [reconcile.MISSING_IN_RESTMAN, "/b", "s3", "", "/x3", ""],
+                ])
+
+    def test_na_equals_empty_resolution_path(self):
+        write_csv(self.rest_csv, REST_HEADER, [["/a", "soap", "id1", "N/A"], ["/a", "soap2", "id2", ""]])
+        write_csv(self.graph_csv, GRAPH_HEADER, [["/a", "soap", ""], ["/a", "soap2", " N/A "]])
+        counts, (_, rows) = self.run_reconcile()
+        self.assertEqual(counts["ok"], 2)
+        self.assertEqual(rows, [])
+
+    def test_short_row_exits_with_error(self):
+        write_csv(self.rest_csv, REST_HEADER, [["/a", "s1", "id1", "/x1"], ["/a"]])
+        write_csv(self.graph_csv, GRAPH_HEADER, [["/a", "s1", "/x1"]])
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(stderr):
+            code = reconcile.main([self.rest_csv, self.graph_csv, "-o", os.path.join(self.tmp, "report.csv")])
+        self.assertEqual(code, 2)
+        self.assertIn("rest.csv:3", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# transport.py
+"""
+Transporte HTTP compartido por RestGUI y GraphGUI.
+- Una sola requests.Session con un pool de conexiones de tamaño fijo (POOL_SIZE), montado para
+  http y https, con keep-alive (la conexión TLS se reutiliza sin nuevo handshake).
+- Compresión: requests ya anuncia gzip/deflate (y br/zstd si están instalados); no se toca.
+- Estadísticas: peticiones, conexiones nuevas (ratio de reutilización) y bytes por la red vs decodificados.
+"""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Ambas herramientas hacen las peticiones de una en una; el pool deja margen si eso cambia
+POOL_SIZE = 10
+
+
+class TransportSession(requests.Session):
+    """requests.Session que contabiliza bytes transferidos y decodificados por respuesta"""
+
+    def __init__(self):
+        super().__init__()
+        self._stats_lock = threading.Lock()
+        self.responses = 0
+        self.bytes_wire = 0
+        self.bytes_decoded = 0
+        # Respuestas comprimidas y chunked: urllib3 no cuenta sus bytes en la red (raw.tell() == 0)
+        self.wire_unknown = 0
+        self._bytes_decoded_measured = 0
+
+    def send(self, request, **kwargs):
+        resp = super().send(request, **kwargs)
+        if not kwargs.get("stream"):
+            # Con stream=False el cuerpo ya se leyó: raw.tell() son los bytes recibidos (comprimidos)
+            try:
+                wire = resp.raw.tell()
+            except Exception:
+                wire = 0
+            decoded = len(resp.content)
+            encoding = resp.headers.get("Content-Encoding", "identity").lower()
+            if not wire and encoding == "identity":
+                # Sin compresión lo recibido es el propio cuerpo (salvo el framing chunked)
+                wire = decoded
+            with self._stats_lock:
+                self.responses += 1
+                self.bytes_decoded += decoded
+                if wire or not decoded:
+                    self.bytes_wire += wire
+                    self._bytes_decoded_measured += decoded
+                else:
+                    self.wire_unknown += 1
+        return resp
+
+    def _pools(self):
+        # El mismo adapter está montado para http y https: contar cada uno una sola vez
+        for adapter in {id(a): a for a in self.adapters.values()}.values():
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    yield pool
+
+    def stats(self):
+        """Contadores acumulados de la sesión (conexiones según los pools vivos de urllib3)"""
+        connections = sum(pool.num_connections for pool in self._pools())
+        pool_requests = sum(pool.num_requests for pool in self._pools())
+        with self._stats_lock:
+            return {
+                "requests": self.responses,
+                "connections": connections,
+                "reuse_ratio": 1.0 - connections / pool_requests if pool_requests else 0.0,
+                "bytes_wire": self.bytes_wire,
+                "bytes_decoded": self.bytes_decoded,
+                "wire_unknown": self.wire_unknown,
+                # Solo con las respuestas cuyo tamaño en la red se conoce
+                "compression_ratio": self._bytes_decoded_measured / self.bytes_wire if self.bytes_wire else 1.0,
+            }
+
+
+def build_session(pool_size=POOL_SIZE, retries=None):
+    """Sesión con pool de `pool_size` conexiones y reintentos (por defecto los de RestGUI)"""
+    if retries is None:
+        retries = Retry(total=5, backoff_factor=1, status_forcelist=[500,502,503,504])
+    session = TransportSession()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def format_stats(stats):
+    line = (f"{stats['requests']} peticiones, {stats['connections']} conexiones "
+            f"(reutilización {stats['reuse_ratio'] * 100:.1f}%), "
+            f"{stats['bytes_wire'] / 1024:.1f} KiB por la red / {stats['bytes_decoded'] / 1024:.1f} KiB decodificados "
+            f"(x{stats['compression_ratio']:.1f})")
+    if stats["wire_unknown"]:
+        line += f", {stats['wire_unknown']} respuestas comprimidas chunked sin tamaño en la red (fuera del ratio)"
+    return line